@@ -6,14 +6,13 @@ This example demonstrates how to:
 - Get the current user's information
 - List all drives (including shared drives) the user has access to
 """
-import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient
 
+from common import get_default_auth
+
 
 def test_get_user_info(drive):
     """Display information about the authenticated user."""
@@ -30,15 +29,9 @@ def test_get_drives_info(drive):
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Step 1: Set up authentication - Set to ephemeral storage for testing
-    auth = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Step 1: Set up authentication - one shared client per process
+    # (loads .env on first use)
+    auth = get_default_auth()
     
     # Step 2: Create Drive client
     drive = DriveClient(auth)
@@ -8,15 +8,14 @@ This example demonstrates how to:
 - Get labels applied to a file
 - List all available labels in the organization
 """
-import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient
 from googleapi_labels import LabelsClient
 
+from common import account_id, disk_cached, get_default_auth
+
 
 # Test file IDs - replace with your own
 # See MY_TEST_IDS.txt for the original test IDs
@@ -55,10 +54,20 @@ def test_get_labels(drive: DriveClient):
         print(f"  - {label}")
 
 
-def test_list_all_labels(labels: LabelsClient):
-    """List all labels available in the organization."""
+def test_list_all_labels(labels: LabelsClient, account: str, refresh: bool = False):
+    """
+    List all labels available in the organization.
+    
+    Label definitions change rarely, so the list is cached on disk for a
+    day under account (the signed-in user, see common.account_id), since
+    each user sees their own organization's labels. Pass refresh=True to
+    fetch a fresh copy.
+    """
     print("\n=== ALL AVAILABLE LABELS ===")
-    all_labels = labels.list_all_labels()
+    all_labels = disk_cached(
+        "labels:all", labels.list_all_labels, ttl=0 if refresh else 86400,
+        account=account
+    )
     print(f"Found {len(all_labels)} labels in organization:")
     for label in all_labels[:5]:  # Show first 5
         print(f"  - {label.get('name', 'Unnamed')}")
@@ -67,15 +76,9 @@ def test_list_all_labels(labels: LabelsClient):
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Step 1: Set up authentication - Set to ephemeral storage for testing
-    auth = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Step 1: Set up authentication - one shared client per process
+    # (loads .env on first use)
+    auth = get_default_auth()
     
     # Step 2: Create clients
     drive = DriveClient(auth)
@@ -84,4 +87,4 @@ if __name__ == "__main__":
     # Run tests
     test_item_properties(drive)
     test_get_labels(drive)
-    test_list_all_labels(labels)
+    test_list_all_labels(labels, account_id(drive))
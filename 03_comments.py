@@ -5,14 +5,15 @@ This example demonstrates how to:
 - Get all comments on a file
 - Reply to a comment
 """
-import os
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import List, Optional
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient
 
+from common import get_default_auth
+
 
 # Test file IDs - replace with your own
 # See MY_TEST_IDS.txt for the original test IDs
@@ -23,25 +24,29 @@ def test_get_comments(drive: DriveClient):
     """Get all comments on a file."""
     print("\n=== FILE COMMENTS ===")
     comments = drive.get_comments(TEST_DOCUMENT_ID)
-    print(f"Found {len(comments)} comments:")
     
+    # Build the report and write it once instead of printing per line
+    lines = [f"Found {len(comments)} comments:"]
     for idx, comment in enumerate(comments, 1):
-        print(f"\n[{idx}] {comment['author']} ({comment['createdTime']}):")
-        print(f"    {comment['content']}")
+        lines.append(f"\n[{idx}] {comment['author']} ({comment['createdTime']}):")
+        lines.append(f"    {comment['content']}")
         if comment.get('snippet'):
-            print(f"    On: \"{comment['snippet']}\"")
+            lines.append(f"    On: \"{comment['snippet']}\"")
         
         # Show replies
         for reply in comment.get('replies', []):
-            print(f"    └─ {reply['author']}: {reply['content']}")
+            lines.append(f"    └─ {reply['author']}: {reply['content']}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
     
     return comments
 
 
-def test_reply_to_comment(drive: DriveClient):
-    """Reply to the first comment on a file."""
+def test_reply_to_comment(drive: DriveClient, comments: Optional[List[dict]] = None):
+    """Reply to the first comment on a file. Pass already-fetched comments to skip a round-trip."""
     print("\n=== REPLY TO COMMENT ===")
-    comments = drive.get_comments(TEST_DOCUMENT_ID)
+    if comments is None:
+        comments = drive.get_comments(TEST_DOCUMENT_ID)
     
     if not comments:
         print("No comments found on this file.")
@@ -59,15 +64,9 @@ def test_reply_to_comment(drive: DriveClient):
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Step 1: Set up authentication - Set to ephemeral storage for testing
-    auth = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Step 1: Set up authentication - one shared client per process
+    # (loads .env on first use)
+    auth = get_default_auth()
     
     # Step 2: Create Drive client
     drive = DriveClient(auth)
@@ -77,4 +76,4 @@ if __name__ == "__main__":
     
     # Uncomment to test replying (will post real comment!)
     # if comments:
-    #     test_reply_to_comment(drive)
+    #     test_reply_to_comment(drive, comments)
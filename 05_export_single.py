@@ -9,17 +9,18 @@ This example demonstrates how to:
 Shows the new decoupled package architecture where you import
 only what you need.
 """
-import os
+import zipfile
 from pathlib import Path
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient, ItemType
 from googleapi_docs import DocsClient
 from googleapi_sheets import SheetsClient, convert_sheets_to_markdown
 from googleapi_slides import SlidesClient, convert_slides_to_markdown
 
+from common import cached_get_item, get_default_auth, use_fast_json
+
 
 # Test file IDs - replace with your own
 # See MY_TEST_IDS.txt for the original test IDs
@@ -28,22 +29,49 @@ TEST_SLIDES_ID = "YOUR_SLIDES_ID_HERE"
 TEST_SHEET_ID = "YOUR_SHEET_ID_HERE"
 
 
-def export_document(drive: DriveClient, docs: DocsClient, doc_id: str, output_dir: Path):
-    """Export a Google Doc to markdown with images and comments."""
+def save_assets(assets, assets_dir: Path, max_workers: int = 8):
+    """Write asset files in parallel - many small writes overlap well on SSDs and network filesystems."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda asset: (assets_dir / asset.name).write_bytes(asset.content), assets))
+
+
+def save_archive(archive_path: Path, markdown: str, assets):
+    """
+    Write markdown and assets into a single uncompressed zip.
+    
+    One file open/close instead of one per asset - much friendlier to
+    slow or shared filesystems when the consumer can read an archive.
+    """
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr('content.md', markdown)
+        for asset in assets:
+            archive.writestr(f'assets/{asset.name}', asset.content)
+
+
+def export_document(drive: DriveClient, docs: DocsClient, doc_id: str, output_dir: Path,
+                    include_comments: bool = True, archive: bool = False):
+    """Export a Google Doc to markdown with images and (optionally) comments."""
     print(f"\n=== EXPORTING DOCUMENT {doc_id} ===")
     
-    # Get file metadata from Drive
-    item = drive.get_item(doc_id)
+    # Fetch metadata and comments (optional, requires Drive API). Both go
+    # through the one DriveClient, which isn't thread-safe, so they run
+    # in turn. Skipping comments saves a full API call when they aren't wanted.
+    item = cached_get_item(drive, doc_id)
+    comments = drive.get_comments(doc_id) if include_comments else None
     print(f"Title: {item.name}")
     print(f"Type: {item.type}")
+    print(f"Comments: {len(comments) if comments is not None else 'skipped'}")
     
-    # Get comments (optional, requires Drive API)
-    comments = drive.get_comments(doc_id)
-    print(f"Comments: {len(comments)}")
-    
-    # Export to markdown via Docs API
+    # Export to markdown via Docs API (needs the comments, so runs after)
     markdown, assets = docs.export(doc_id, comments=comments)
     
+    # Optionally pack everything into one archive
+    if archive:
+        archive_path = output_dir / f"{doc_id}.zip"
+        save_archive(archive_path, markdown, assets)
+        print(f"✓ Document exported to {archive_path}")
+        return
+    
     # Save to disk
     doc_output_dir = output_dir / doc_id
     doc_output_dir.mkdir(parents=True, exist_ok=True)
@@ -56,33 +84,39 @@ def export_document(drive: DriveClient, docs: DocsClient, doc_id: str, output_di
     if assets:
         assets_dir = doc_output_dir / 'assets'
         assets_dir.mkdir(exist_ok=True)
-        for asset in assets:
-            asset_path = assets_dir / asset.name
-            asset_path.write_bytes(asset.content)
+        save_assets(assets, assets_dir)
         print(f"Saved {len(assets)} assets to {assets_dir}")
     
     print(f"✓ Document exported to {doc_output_dir}")
 
 
-def export_slides(drive: DriveClient, slides: SlidesClient, slides_id: str, output_dir: Path):
-    """Export a Google Slides presentation to markdown with images."""
+def export_slides(drive: DriveClient, slides: SlidesClient, slides_id: str, output_dir: Path,
+                  include_comments: bool = True, archive: bool = False):
+    """Export a Google Slides presentation to markdown with images and (optionally) comments."""
     print(f"\n=== EXPORTING SLIDES {slides_id} ===")
     
-    # Get file metadata from Drive
-    item = drive.get_item(slides_id)
+    # Fetch presentation data (Slides client) in the background while the
+    # Drive calls run in turn here - the DriveClient isn't thread-safe, so
+    # only calls on different clients overlap
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        data_future = executor.submit(slides.fetch_presentation_data, slides_id)
+        item = cached_get_item(drive, slides_id)
+        comments = drive.get_comments(slides_id) if include_comments else None
+        presentation_data = data_future.result()
     print(f"Title: {item.name}")
-    
-    # Get comments (optional)
-    comments = drive.get_comments(slides_id)
-    print(f"Comments: {len(comments)}")
-    
-    # Fetch presentation data
-    presentation_data = slides.fetch_presentation_data(slides_id)
+    print(f"Comments: {len(comments) if comments is not None else 'skipped'}")
     print(f"Slides: {len(presentation_data['slides'])}")
     
     # Convert to markdown
     markdown, assets = convert_slides_to_markdown(presentation_data, comments=comments)
     
+    # Optionally pack everything into one archive
+    if archive:
+        archive_path = output_dir / f"{slides_id}.zip"
+        save_archive(archive_path, markdown, assets)
+        print(f"✓ Slides exported to {archive_path}")
+        return
+    
     # Save to disk
     slides_output_dir = output_dir / slides_id
     slides_output_dir.mkdir(parents=True, exist_ok=True)
@@ -95,28 +129,27 @@ def export_slides(drive: DriveClient, slides: SlidesClient, slides_id: str, outp
     if assets:
         assets_dir = slides_output_dir / 'assets'
         assets_dir.mkdir(exist_ok=True)
-        for asset in assets:
-            asset_path = assets_dir / asset.name
-            asset_path.write_bytes(asset.content)
+        save_assets(assets, assets_dir)
         print(f"Saved {len(assets)} assets to {assets_dir}")
     
     print(f"✓ Slides exported to {slides_output_dir}")
 
 
-def export_sheet(drive: DriveClient, sheets: SheetsClient, sheet_id: str, output_dir: Path):
-    """Export a Google Sheet to markdown tables."""
+def export_sheet(drive: DriveClient, sheets: SheetsClient, sheet_id: str, output_dir: Path,
+                 include_comments: bool = True):
+    """Export a Google Sheet to markdown tables with (optionally) comments."""
     print(f"\n=== EXPORTING SHEET {sheet_id} ===")
     
-    # Get file metadata from Drive
-    item = drive.get_item(sheet_id)
+    # Fetch spreadsheet data (Sheets client) in the background while the
+    # Drive calls run in turn here - the DriveClient isn't thread-safe, so
+    # only calls on different clients overlap
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        data_future = executor.submit(sheets.fetch_spreadsheet_data, sheet_id)
+        item = cached_get_item(drive, sheet_id)
+        comments = drive.get_comments(sheet_id) if include_comments else None
+        sheets_data = data_future.result()
     print(f"Title: {item.name}")
-    
-    # Get comments (optional)
-    comments = drive.get_comments(sheet_id)
-    print(f"Comments: {len(comments)}")
-    
-    # Fetch spreadsheet data
-    sheets_data = sheets.fetch_spreadsheet_data(sheet_id)
+    print(f"Comments: {len(comments) if comments is not None else 'skipped'}")
     print(f"Sheets/tabs: {len(sheets_data)}")
     
     # Convert to markdown
@@ -154,22 +187,18 @@ def export_doc_without_drive(docs: DocsClient, doc_id: str, output_dir: Path):
     if assets:
         assets_dir = doc_output_dir / 'assets'
         assets_dir.mkdir(exist_ok=True)
-        for asset in assets:
-            (assets_dir / asset.name).write_bytes(asset.content)
+        save_assets(assets, assets_dir)
     
     print(f"✓ Document exported to {doc_output_dir} (without Drive API)")
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Step 1: Set up authentication - Set to ephemeral storage for testing
-    auth_client = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Step 1: Set up authentication - one shared client per process
+    # (loads .env on first use)
+    auth_client = get_default_auth()
+    
+    # Optional: faster response parsing for large documents (needs orjson)
+    use_fast_json()
     
     # Step 2: Create API clients
     # Only import what you need! Each client is independent.
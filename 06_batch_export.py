@@ -4,34 +4,102 @@ Example: Batch Export Operations (DEPRECATED)
 This example is deprecated. Please see 09_batch_export_parallel.py for the new approach.
 
 The old gdrivekit had a BatchExporter class with orchestration. The new approach
-uses standard Python multiprocessing patterns, giving you more control and flexibility.
+uses standard Python concurrency patterns, giving you more control and flexibility.
 
 Key differences:
 - Old: BatchExporter class with complex state management
-- New: Simple multiprocessing.Pool with worker functions
+- New: Simple thread pool with worker functions
 
 See: 09_batch_export_parallel.py for the recommended pattern.
 
 This file is kept for reference but will be removed in the future.
 """
-import os
+import argparse
+import threading
 from pathlib import Path
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient, ItemType
 from googleapi_docs import DocsClient
 
+from common import get_default_auth
 
-def simple_batch_export_example():
+
+# Each worker thread's own API clients (service objects are not safe to
+# share between threads), built on first use and reused across documents
+_local = threading.local()
+
+
+def _get_clients():
+    """Return this thread's Drive/Docs clients, building them once."""
+    if not hasattr(_local, 'drive'):
+        auth = get_default_auth()
+        _local.drive = DriveClient(auth)
+        _local.docs = DocsClient(auth)
+    return _local.drive, _local.docs
+
+
+def _export_one(doc_id: str, output_base: Path, include_comments: bool = True) -> Optional[bool]:
+    """
+    Export a single document. Runs inside a worker thread.
+    
+    The OAuth client is shared process-wide, but each worker thread
+    builds its own API clients once - the underlying service objects are
+    not safe to share between threads.
+    
+    Returns:
+        True on success, False on failure, None if skipped
     """
-    Simple batch export without multiprocessing.
-    For parallel processing, see 09_batch_export_parallel.py
+    try:
+        drive, docs = _get_clients()
+        
+        # Get metadata
+        item = drive.get_item(doc_id)
+        
+        # Skip if not a doc
+        if item.type != ItemType.DOCS_DOCUMENT:
+            print(f"⊙ Skipping {item.name} (not a Google Doc)")
+            return None
+        
+        print(f"Exporting: {item.name}...")
+        
+        # Get comments (skipped entirely when not wanted - saves an API call)
+        comments = drive.get_comments(doc_id) if include_comments else None
+        
+        # Export
+        markdown, assets = docs.export(doc_id, comments=comments)
+        
+        # Save
+        doc_output = output_base / doc_id
+        doc_output.mkdir(parents=True, exist_ok=True)
+        
+        (doc_output / 'content.md').write_text(markdown)
+        
+        if assets:
+            assets_dir = doc_output / 'assets'
+            assets_dir.mkdir(exist_ok=True)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda asset: (assets_dir / asset.name).write_bytes(asset.content), assets))
+        
+        print(f"✓ Exported {item.name}")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Failed to export {doc_id}: {e}")
+        return False
+
+
+def simple_batch_export_example(max_workers: int = 8, include_comments: bool = True):
+    """
+    Simple batch export using a thread pool.
+    
+    For caching and per-thread client reuse, see 09_batch_export_parallel.py
     """
     print("\n=== SIMPLE BATCH EXPORT ===")
-    print("Exporting multiple documents sequentially...")
-    print("(For parallel processing, see 09_batch_export_parallel.py)\n")
+    print(f"Exporting multiple documents with {max_workers} threads...")
+    print("(For caching, see 09_batch_export_parallel.py)\n")
     
     # Test file IDs - replace with a list of your own ids to export
     test_ids = [
@@ -39,71 +107,41 @@ def simple_batch_export_example():
         # Add more IDs here...
     ]
     
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Create clients - Set to ephemeral storage for testing
-    auth = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Drop duplicate IDs (keeping order) so no document is fetched twice
+    test_ids = list(dict.fromkeys(test_ids))
+    if not test_ids:
+        print("No documents to export")
+        return
     
-    drive = DriveClient(auth)
-    docs = DocsClient(auth)
+    # Authenticate once up front so the workers share the same client
+    get_default_auth()
     
     # Output directory
     output_base = Path(__file__).parent / "batch_exported"
     output_base.mkdir(exist_ok=True)
     
-    # Export each document
+    # Export documents in parallel
+    # Drive tolerates ~100 requests/100s per user, so 8 workers is safe
     results = {'success': 0, 'failed': 0}
     
-    for doc_id in test_ids:
-        try:
-            # Get metadata
-            item = drive.get_item(doc_id)
-            
-            # Skip if not a doc
-            if item.type != ItemType.DOCS_DOCUMENT:
-                print(f"⊙ Skipping {item.name} (not a Google Doc)")
-                continue
-            
-            print(f"Exporting: {item.name}...")
-            
-            # Get comments
-            comments = drive.get_comments(doc_id)
-            
-            # Export
-            markdown, assets = docs.export(doc_id, comments=comments)
-            
-            # Save
-            doc_output = output_base / doc_id
-            doc_output.mkdir(parents=True, exist_ok=True)
-            
-            (doc_output / 'content.md').write_text(markdown)
-            
-            if assets:
-                assets_dir = doc_output / 'assets'
-                assets_dir.mkdir(exist_ok=True)
-                for asset in assets:
-                    (assets_dir / asset.name).write_bytes(asset.content)
-            
-            print(f"✓ Exported {item.name}")
-            results['success'] += 1
-            
-        except Exception as e:
-            print(f"✗ Failed to export {doc_id}: {e}")
-            results['failed'] += 1
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(test_ids))) as executor:
+        for ok in executor.map(lambda doc_id: _export_one(doc_id, output_base, include_comments), test_ids):
+            if ok is not None:
+                results['success' if ok else 'failed'] += 1
     
     print(f"\n=== RESULTS ===")
     print(f"Success: {results['success']}")
     print(f"Failed: {results['failed']}")
     print(f"\nOutput saved to: {output_base}")
-    print(f"\n💡 TIP: For faster batch exports, see 09_batch_export_parallel.py")
+    print(f"\n💡 TIP: For cached batch exports, see 09_batch_export_parallel.py")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simple batch export (deprecated)")
+    parser.add_argument('--no-comments', action='store_true',
+                        help="Don't fetch or annotate comments (one less API call per doc)")
+    args = parser.parse_args()
+    
     print("="*80)
     print("⚠️  DEPRECATED: This example is deprecated")
     print("="*80)
@@ -111,7 +149,7 @@ if __name__ == "__main__":
     print("This old batch exporter pattern is no longer recommended.")
     print("Please use 09_batch_export_parallel.py for the new approach.")
     print()
-    print("Press Enter to run a simple sequential export demo, or Ctrl+C to exit...")
+    print("Press Enter to run a simple threaded export demo, or Ctrl+C to exit...")
     input()
     
-    simple_batch_export_example()
+    simple_batch_export_example(include_comments=not args.no_comments)
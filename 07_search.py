@@ -6,14 +6,30 @@ This example demonstrates how to:
 - Search files by content across all drives
 - Search within a specific folder
 """
-import os
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
-from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient
 
+from common import get_default_auth, use_fast_json
+
+
+def print_results(results):
+    """Print search results with a single write instead of one print per line."""
+    if not results:
+        print("No results found.\n")
+        return
+    
+    lines = [f"\nFound {len(results)} results:"]
+    for i, item in enumerate(results, 1):
+        lines.append(f"  {i}. {item.name}")
+        lines.append(f"     ID: {item.id}")
+        lines.append(f"     Type: {item.type.value}")
+        lines.append(f"     Modified: {item.modified_time}")
+        lines.append("")
+    sys.stdout.write("\n".join(lines) + "\n")
+
 
 def test_search(drive: DriveClient):
     # Example 1: Search by name across all drives
@@ -25,16 +41,7 @@ def test_search(drive: DriveClient):
         print(f"\nSearching for files with '{query}' in the name...")
         results = drive.search_by_name(query, limit=10)
         
-        if results:
-            print(f"\nFound {len(results)} results:")
-            for i, item in enumerate(results, 1):
-                print(f"  {i}. {item.name}")
-                print(f"     ID: {item.id}")
-                print(f"     Type: {item.type.value}")
-                print(f"     Modified: {item.modified_time}")
-                print()
-        else:
-            print("No results found.\n")
+        print_results(results)
     
     # Example 2: Search by content across all drives
     print("=" * 60)
@@ -45,16 +52,7 @@ def test_search(drive: DriveClient):
         print(f"\nSearching for files containing '{query}'...")
         results = drive.search_by_content(query, limit=10)
         
-        if results:
-            print(f"\nFound {len(results)} results:")
-            for i, item in enumerate(results, 1):
-                print(f"  {i}. {item.name}")
-                print(f"     ID: {item.id}")
-                print(f"     Type: {item.type.value}")
-                print(f"     Modified: {item.modified_time}")
-                print()
-        else:
-            print("No results found.\n")
+        print_results(results)
     
     # Example 3: Search within a specific folder
     print("=" * 60)
@@ -67,16 +65,7 @@ def test_search(drive: DriveClient):
             print(f"\nSearching for '{query}' in folder {folder_id} and its subfolders...")
             results = drive.search_by_name(query, limit=10, folder_id=folder_id)
             
-            if results:
-                print(f"\nFound {len(results)} results:")
-                for i, item in enumerate(results, 1):
-                    print(f"  {i}. {item.name}")
-                    print(f"     ID: {item.id}")
-                    print(f"     Type: {item.type.value}")
-                    print(f"     Modified: {item.modified_time}")
-                    print()
-            else:
-                print("No results found.\n")
+            print_results(results)
     
     print("=" * 60)
     print("Search examples complete!")
@@ -84,15 +73,12 @@ def test_search(drive: DriveClient):
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
+    # Step 1: Set up authentication - one shared client per process
+    # (loads .env on first use)
+    auth = get_default_auth()
     
-    # Step 1: Set up authentication - Set to ephemeral storage for testing
-    auth = OAuth2Client(
-        client_id=os.getenv('CLIENT_ID'),
-        client_secret=os.getenv('CLIENT_SECRET'),
-        scopes=os.getenv('CLIENT_SCOPES', '').split(',')
-    )
+    # Optional: faster parsing of large result pages (needs orjson)
+    use_fast_json()
     
     # Step 2: Create Drive client
     drive = DriveClient(auth)
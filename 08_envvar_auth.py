@@ -22,12 +22,13 @@ How it works:
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
 from googleapi_oauth import OAuth2Client
 from secretstore import EnvVarStorage
 from googleapi_drive import DriveClient
 
+from common import config
+
 
 def example_envvar_storage():
     """
@@ -40,11 +41,12 @@ def example_envvar_storage():
     print("Using EnvVarStorage for token management...")
     print()
     
-    client_id = os.getenv('CLIENT_ID')
-    client_secret = os.getenv('CLIENT_SECRET')
-    scopes = os.getenv('CLIENT_SCOPES', '').split(',')
+    cfg = config()
+    client_id = cfg.client_id
+    client_secret = cfg.client_secret
+    scopes = list(cfg.scopes)
     
-    if not all([client_id, client_secret]):
+    if not (client_id and client_secret):
         print("✗ Missing CLIENT_ID or CLIENT_SECRET environment variables")
         return
     
@@ -136,8 +138,8 @@ def check_env_vars():
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
+    # Load environment variables from .env file (parsed once, reused below)
+    config()
     
     print("="*80)
     print("ENVIRONMENT VARIABLE TOKEN STORAGE EXAMPLE")
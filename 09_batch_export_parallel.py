@@ -2,107 +2,337 @@
 Example: Batch Export with Parallel Processing
 
 This example demonstrates how to:
-- Export multiple documents in parallel using multiprocessing
+- Export multiple documents in parallel using a thread pool
 - Implement simple caching to skip unchanged files
 - Handle errors gracefully
 
-No BatchExporter class needed - just standard Python multiprocessing.
+No BatchExporter class needed - just the standard library's
+concurrent.futures (why threads: see ARCHITECTURE.md, Pattern 3).
 """
+import json
 import os
+import threading
+from collections import Counter
 from pathlib import Path
-from multiprocessing import Pool
-from typing import List, Tuple
-import json
-import hashlib
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+import sqlite3
+import time
+import xxhash
 
 from googleapi_oauth import OAuth2Client
 from secretstore import KeyringStorage
 from googleapi_drive import DriveClient, ItemType
 from googleapi_docs import DocsClient
 
+from common import call_with_backoff, config, get_default_auth, use_fast_json
 
-# Global auth config (loaded once, shared across workers)
-AUTH_CONFIG = None
 
+# Per-thread worker state: the shared auth client plus the thread's own
+# API clients (service objects are not safe to share between threads)
+_worker = threading.local()
 
-def init_worker(client_id: str, client_secret: str, scopes: List[str]):
-    """Initialize worker process with auth credentials."""
-    global AUTH_CONFIG
-    AUTH_CONFIG = {
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'scopes': scopes
-    }
+# Export cache: one SQLite file per output directory (instead of a
+# .cache.json per doc). WAL mode lets worker threads read while one writes.
+CACHE_DB_NAME = '.export_cache.sqlite'
+
+# Docs exported this recently (with content.md untouched) are skipped
+# without even asking Drive whether they changed
+CACHE_FRESH_SECONDS = 60
+
+# Rebuild a thread's API clients after this many documents, so discovery
+# documents and response buffers they hold on to don't pile up over
+# batches of thousands of docs
+MAX_CLIENT_USES = 100
+
+# Threads per document for writing its assets
+ASSET_WRITE_WORKERS = 8
+
+# Content-addressed asset store shared by every doc in the output
+# directory: each distinct image is written once and hard-linked into
+# the docs that embed it (a logo used by 50 docs is stored once)
+ASSET_STORE_NAME = '_assets_cas'
+
+
+def open_cache(output_base_dir: Path) -> sqlite3.Connection:
+    """Open (creating if needed) the export cache for an output directory."""
+    output_base_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(output_base_dir / CACHE_DB_NAME, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS cache ('
+        ' doc_id TEXT PRIMARY KEY,'
+        ' title TEXT,'
+        ' modified_time TEXT,'
+        ' size INTEGER,'
+        ' mtime REAL,'
+        ' exported_at REAL,'
+        ' content_hash TEXT,'
+        ' hash_algorithm TEXT,'
+        ' comments_hash TEXT)'
+    )
+    # Caches created before the comments column existed
+    try:
+        conn.execute('ALTER TABLE cache ADD COLUMN comments_hash TEXT')
+    except sqlite3.OperationalError:
+        pass  # already there
+    return conn
+
+
+def init_worker(auth: OAuth2Client):
+    """Initialize worker thread with the batch's shared auth client."""
+    _worker.auth = auth
+
+
+def get_worker_clients() -> Tuple[DriveClient, DocsClient]:
+    """
+    Return this worker thread's clients, building them on first use.
+    
+    Clients are recycled every MAX_CLIENT_USES calls to bound memory
+    in long batches. Outside a pool set up with init_worker, they use
+    the process-wide get_default_auth() client.
+    """
+    if not hasattr(_worker, 'drive') or _worker.uses >= MAX_CLIENT_USES:
+        auth = getattr(_worker, 'auth', None) or get_default_auth()
+        _worker.drive = DriveClient(auth)
+        _worker.docs = DocsClient(auth)
+        _worker.uses = 0
+    _worker.uses += 1
+    return _worker.drive, _worker.docs
+
+
+def get_worker_cache(output_base_dir: Path) -> sqlite3.Connection:
+    """
+    Return this worker thread's cache connection for an output directory.
+    
+    Connections are per-thread (sqlite3 requirement) and per directory,
+    so exports to different output directories never share a database.
+    """
+    if not hasattr(_worker, 'caches'):
+        _worker.caches = {}
+    key = Path(output_base_dir).resolve()
+    if key not in _worker.caches:
+        _worker.caches[key] = open_cache(output_base_dir)
+    return _worker.caches[key]
+
+
+def write_file(path: Path, data: bytes):
+    """
+    Write bytes straight to a file descriptor.
+    
+    Skips the buffered file object, so large assets go to the kernel
+    from a memoryview without an extra userspace copy.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def comments_fingerprint(comments: List[dict]) -> str:
+    """
+    Hash the full comments payload (xxh3 over sorted-key JSON).
+    
+    Comment edits don't move the file's modified_time, so the cache
+    compares this too. Hashing everything catches any change - edits,
+    replies, resolves, deletions - even within the same minute.
+    """
+    payload = json.dumps(comments, sort_keys=True, default=str).encode()
+    return xxhash.xxh3_64(payload).hexdigest()
+
+
+def stat_or_none(path: Path):
+    """stat() a path, or None if it doesn't exist (one syscall instead of exists() + stat())."""
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def file_matches(path: Path, data: bytes) -> bool:
+    """Check whether path already holds exactly data (size first, then bytes)."""
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
+
+def store_asset(store_dir: Path, data: bytes, suffix: str) -> Path:
+    """
+    Put data in the content-addressed store, returning its path.
+    
+    Files are keyed by their xxh3_128 hash, so identical bytes map to
+    the same path and are only written the first time.
+    """
+    key = xxhash.xxh3_128(data).hexdigest()
+    path = store_dir / key[:2] / f"{key}{suffix}"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so a concurrent reader never links
+        # a half-written file
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        write_file(tmp, data)
+        os.replace(tmp, path)
+    return path
 
 
-def export_document_worker(args: Tuple[str, Path]) -> dict:
+def save_asset(assets_dir: Path, store_dir: Path, asset):
+    """Link one asset into the doc from the store (copy if links aren't supported)."""
+    asset_path = assets_dir / asset.name
+    stored = store_asset(store_dir, asset.content, Path(asset.name).suffix)
+    try:
+        if asset_path.exists() and os.path.samefile(asset_path, stored):
+            return
+        asset_path.unlink(missing_ok=True)
+        os.link(stored, asset_path)
+    except OSError:
+        # No hard links here (e.g. FAT, some network shares) - plain copy.
+        # Replace rather than truncate: asset_path may still be a link to
+        # the stored file, and writing through it would corrupt the store.
+        if not file_matches(asset_path, asset.content):
+            tmp = asset_path.with_name(f"{asset_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            write_file(tmp, asset.content)
+            os.replace(tmp, asset_path)
+
+
+def export_document_worker(
+    doc_id: str,
+    output_base_dir: Path,
+    item=None,
+    cache_data: Optional[dict] = None,
+    check_comments: bool = False
+) -> dict:
     """
     Worker function to export a single document.
     
+    Normally run by batch_export_parallel's pool (after init_worker);
+    called directly, it authenticates with get_default_auth().
+    
     Args:
-        args: Tuple of (doc_id, output_base_dir)
+        doc_id: Document ID to export
+        output_base_dir: Base output directory
+        item: Drive metadata already fetched by the caller (skips get_item)
+        cache_data: The doc's cache row as read by the caller ({} if none);
+            looked up here when not given
+        check_comments: Also re-export when only the comments changed
+            (opt-in: costs a comments request for unchanged docs)
         
     Returns:
         Result dict with status and info
     """
-    doc_id, output_base_dir = args
+    output_dir = output_base_dir / doc_id
+    content_file = output_dir / 'content.md'
     
     try:
-        # Create clients (each worker needs its own)
-        auth = OAuth2Client(
-            client_id=AUTH_CONFIG['client_id'],
-            client_secret=AUTH_CONFIG['client_secret'],
-            scopes=AUTH_CONFIG['scopes'],
-            storage=KeyringStorage("batch-export-worker")
-        )
+        cache = get_worker_cache(output_base_dir)
+        if cache_data is None:
+            row = cache.execute('SELECT * FROM cache WHERE doc_id = ?', (doc_id,)).fetchone()
+            cache_data = dict(row) if row else {}
         
-        drive = DriveClient(auth)
-        docs = DocsClient(auth)
+        # Fast path: exported moments ago and content.md untouched since -
+        # skip without building clients or making any API call
+        stat = stat_or_none(content_file) if cache_data else None
+        if (stat
+                and stat.st_size == cache_data.get('size')
+                and stat.st_mtime == cache_data.get('mtime')
+                and time.time() - (cache_data.get('exported_at') or 0) < CACHE_FRESH_SECONDS):
+            return {
+                'status': 'cached',
+                'doc_id': doc_id,
+                'title': cache_data.get('title'),
+                'message': 'Exported recently, skipped'
+            }
         
-        # Get file metadata
-        item = drive.get_item(doc_id)
+        # Get this thread's clients (built once, reused across tasks)
+        drive, docs = get_worker_clients()
         
-        # Check if file changed (simple caching)
-        output_dir = output_base_dir / doc_id
-        cache_file = output_dir / '.cache.json'
+        # Get file metadata (unless the caller already listed it)
+        if item is None:
+            item = call_with_backoff(drive.get_item, doc_id)
         
-        if cache_file.exists():
-            cache_data = json.loads(cache_file.read_text())
-            if cache_data.get('modified_time') == item.modified_time:
-                return {
-                    'status': 'cached',
-                    'doc_id': doc_id,
-                    'title': item.name,
-                    'message': 'File unchanged, skipped'
-                }
+        # Check if file changed (simple caching). Without comment checks
+        # that's enough to skip, before any comments request.
+        file_unchanged = cache_data.get('modified_time') == item.modified_time
+        if file_unchanged and not check_comments:
+            return {
+                'status': 'cached',
+                'doc_id': doc_id,
+                'title': item.name,
+                'message': 'File unchanged, skipped'
+            }
+        
+        # Check if comments changed - they're needed for the export anyway,
+        # so a changed doc costs nothing extra
+        comments = call_with_backoff(drive.get_comments, doc_id)
+        comments_hash = comments_fingerprint(comments)
+        if file_unchanged and cache_data.get('comments_hash') == comments_hash:
+            return {
+                'status': 'cached',
+                'doc_id': doc_id,
+                'title': item.name,
+                'message': 'File and comments unchanged, skipped'
+            }
         
         # Export document
-        comments = drive.get_comments(doc_id)
-        markdown, assets = docs.export(doc_id, comments=comments)
+        markdown, assets = call_with_backoff(docs.export, doc_id, comments=comments)
         
-        # Save to disk
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # Save to disk - one mkdir call creates the doc dir and, when
+        # needed, its assets dir (nothing per asset)
+        assets_dir = output_dir / 'assets'
+        (assets_dir if assets else output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Save markdown
-        (output_dir / 'content.md').write_text(markdown)
+        # Save markdown - modified_time also moves on edits that don't
+        # change the exported text (renames, property updates), so only
+        # rewrite content.md when the content hash differs. Encode once and
+        # use the same bytes for the hash and the write.
+        content_bytes = markdown.encode()
+        content_hash = xxhash.xxh3_64(content_bytes).hexdigest()
+        content_stat = stat_or_none(content_file)
+        unchanged = (
+            content_hash == cache_data.get('content_hash')
+            and content_stat is not None
+            and content_stat.st_size == cache_data.get('size')
+        )
+        if not unchanged:
+            write_file(content_file, content_bytes)
+            content_stat = content_file.stat()
         
-        # Save assets
-        if assets:
-            assets_dir = output_dir / 'assets'
-            assets_dir.mkdir(exist_ok=True)
-            for asset in assets:
-                (assets_dir / asset.name).write_bytes(asset.content)
+        # Save assets - new bytes go into the shared store once, and the
+        # doc gets hard links. File I/O releases the GIL, so image-heavy
+        # docs do this concurrently.
+        store_dir = output_base_dir / ASSET_STORE_NAME
+        if len(assets) > 1:
+            with ThreadPoolExecutor(max_workers=ASSET_WRITE_WORKERS) as executor:
+                list(executor.map(save_asset, repeat(assets_dir), repeat(store_dir), assets))
+        elif assets:
+            save_asset(assets_dir, store_dir, assets[0])
         
         # Save cache metadata
         cache_data = {
             'doc_id': doc_id,
             'title': item.name,
             'modified_time': item.modified_time,
-            'exported_at': str(Path(output_dir).stat().st_mtime),
-            'content_hash': hashlib.md5(markdown.encode()).hexdigest()
+            'size': content_stat.st_size,
+            'mtime': content_stat.st_mtime,
+            'exported_at': time.time(),
+            'content_hash': content_hash,
+            'hash_algorithm': 'xxh3_64',
+            'comments_hash': comments_hash
         }
-        cache_file.write_text(json.dumps(cache_data, indent=2))
+        with cache:
+            cache.execute(
+                f'INSERT OR REPLACE INTO cache ({", ".join(cache_data)})'
+                f' VALUES ({", ".join(":" + key for key in cache_data)})',
+                cache_data
+            )
         
         return {
             'status': 'success',
@@ -120,11 +350,24 @@ def export_document_worker(args: Tuple[str, Path]) -> dict:
         }
 
 
+def print_result(result: dict):
+    """Print a one-line status for an export result."""
+    if result['status'] == 'success':
+        print(f"✓ {result['title']} ({result['doc_id']})")
+    elif result['status'] == 'cached':
+        print(f"⊙ {result['title']} (cached)")
+    else:
+        print(f"✗ {result['doc_id']}: {result['error']}")
+
+
 def batch_export_parallel(
     doc_ids: List[str],
     output_dir: Path,
     auth_config: dict,
-    num_workers: int = 4
+    num_workers: int = 4,
+    items: Optional[Dict[str, object]] = None,
+    check_comments: bool = False,
+    auth: Optional[OAuth2Client] = None
 ) -> List[dict]:
     """
     Export multiple documents in parallel.
@@ -134,45 +377,97 @@ def batch_export_parallel(
         output_dir: Base output directory
         auth_config: Dict with client_id, client_secret, scopes
         num_workers: Number of parallel workers
+        items: Optional {doc_id: DriveItem} from an earlier search/list.
+            Workers don't re-fetch metadata for these docs.
+        check_comments: Also re-export docs whose only change is in their
+            comments. Off by default: unchanged docs are skipped on
+            modified_time alone - with no request at all for docs in
+            items. Comment edits don't show in the file metadata, so
+            turning it on costs one comments request per unchanged doc.
+        auth: An already-authenticated client to share with the workers
+            (saves a second keychain entry, read and token refresh);
+            one is built from auth_config when not given
         
     Returns:
-        List of result dicts
+        List of result dicts, in completion order
     """
     print(f"\n=== BATCH EXPORT: {len(doc_ids)} documents, {num_workers} workers ===\n")
     
-    # Prepare arguments for each worker
-    args = [(doc_id, output_dir) for doc_id in doc_ids]
+    # Faster response parsing if orjson is installed (process-wide)
+    use_fast_json()
     
-    # Run in parallel
-    with Pool(
-        processes=num_workers,
-        initializer=init_worker,
-        initargs=(
-            auth_config['client_id'],
-            auth_config['client_secret'],
-            auth_config['scopes']
+    items = items or {}
+    results = []
+    counts = Counter()
+    
+    # Create the cache table up front and read it in one query - workers
+    # get their doc's row handed to them and only ever write.
+    cache = open_cache(output_dir)
+    rows = {row['doc_id']: dict(row) for row in cache.execute('SELECT * FROM cache')}
+    cache.close()
+    
+    # Without comment checks, docs whose listed modified_time matches the
+    # cache are skipped here, with no request and no trip through the pool.
+    pending = []
+    for doc_id in doc_ids:
+        item = items.get(doc_id)
+        row = rows.get(doc_id) if item and not check_comments else None
+        if row and row['modified_time'] == item.modified_time:
+            result = {
+                'status': 'cached',
+                'doc_id': doc_id,
+                'title': item.name,
+                'message': 'File unchanged, skipped'
+            }
+            results.append(result)
+            counts[result['status']] += 1
+            print_result(result)
+        else:
+            pending.append(doc_id)
+    
+    # Largest docs first (by last export's size; never-exported docs count
+    # as largest), so a big doc doesn't start last and leave the other
+    # workers idle while it finishes
+    pending.sort(
+        key=lambda doc_id: rows.get(doc_id, {}).get('size') or float('inf'),
+        reverse=True
+    )
+    
+    # One auth client for the whole batch - a single storage lookup and
+    # token refresh shared by every worker thread (the caller's, if any)
+    if auth is None:
+        auth = OAuth2Client(
+            **auth_config,
+            storage=KeyringStorage("batch-export-worker")
         )
-    ) as pool:
-        results = pool.map(export_document_worker, args)
     
-    # Print summary
-    success_count = sum(1 for r in results if r['status'] == 'success')
-    cached_count = sum(1 for r in results if r['status'] == 'cached')
-    error_count = sum(1 for r in results if r['status'] == 'error')
+    # Run in parallel - one pool for the whole batch, so each worker
+    # thread keeps its clients warm across documents. Results are handled
+    # as they complete (not in input order), so a slow doc doesn't hold
+    # back reporting and errors show up immediately.
+    with ThreadPoolExecutor(
+        max_workers=num_workers,
+        initializer=init_worker,
+        initargs=(auth,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                export_document_worker, doc_id, output_dir,
+                items.get(doc_id), rows.get(doc_id, {}), check_comments
+            )
+            for doc_id in pending
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            counts[result['status']] += 1
+            print_result(result)
     
+    # Print summary (counted as results came in - no extra passes)
     print(f"\n=== BATCH EXPORT COMPLETE ===")
-    print(f"Success: {success_count}")
-    print(f"Cached: {cached_count}")
-    print(f"Errors: {error_count}")
-    
-    # Show details
-    for result in results:
-        if result['status'] == 'success':
-            print(f"✓ {result['title']} ({result['doc_id']})")
-        elif result['status'] == 'cached':
-            print(f"⊙ {result['title']} (cached)")
-        else:
-            print(f"✗ {result['doc_id']}: {result['error']}")
+    print(f"Success: {counts['success']}")
+    print(f"Cached: {counts['cached']}")
+    print(f"Errors: {counts['error']}")
     
     return results
 
@@ -182,7 +477,8 @@ def search_and_export(
     search_query: str,
     limit: int,
     output_dir: Path,
-    auth_config: dict
+    auth_config: dict,
+    auth: Optional[OAuth2Client] = None
 ):
     """
     Search for documents and export them in parallel.
@@ -194,34 +490,29 @@ def search_and_export(
     # Search for documents
     results = drive.search_by_name(search_query, limit=limit)
     
-    # Filter to just Google Docs
-    doc_ids = [
-        item.id for item in results
+    # Filter to just Google Docs - keep the metadata the search already
+    # returned so the export doesn't fetch it again doc by doc
+    items = {
+        item.id: item for item in results
         if item.type == ItemType.DOCS_DOCUMENT
-    ]
+    }
     
-    print(f"Found {len(doc_ids)} Google Docs")
+    print(f"Found {len(items)} Google Docs")
     
-    if not doc_ids:
+    if not items:
         print("No documents to export")
         return
     
     # Batch export
-    batch_export_parallel(doc_ids, output_dir, auth_config, num_workers=4)
+    batch_export_parallel(list(items), output_dir, auth_config, num_workers=4, items=items, auth=auth)
 
 
 if __name__ == "__main__":
-    # Load environment variables from .env file
-    load_dotenv()
-    
-    # Auth config
-    auth_config = {
-        'client_id': os.getenv('CLIENT_ID'),
-        'client_secret': os.getenv('CLIENT_SECRET'),
-        'scopes': os.getenv('CLIENT_SCOPES', '').split(',')
-    }
+    # Auth config (loads .env)
+    auth_config = config().oauth_kwargs()
     
-    # Create main thread clients (for searching)
+    # Create main thread clients (for searching) - the export workers
+    # share this auth client too, so the keychain is read once
     auth = OAuth2Client(
         client_id=auth_config['client_id'],
         client_secret=auth_config['client_secret'],
@@ -241,17 +532,17 @@ if __name__ == "__main__":
         # Add more doc IDs here...
     ]
     
-    batch_export_parallel(doc_ids, output_dir, auth_config, num_workers=4)
+    batch_export_parallel(doc_ids, output_dir, auth_config, num_workers=4, auth=auth)
     
     # Example 2: Search and export
-    # search_and_export(drive, "meeting notes", limit=10, output_dir=output_dir, auth_config=auth_config)
+    # search_and_export(drive, "meeting notes", limit=10, output_dir=output_dir, auth_config=auth_config, auth=auth)
     
     # Example 3: Recursively export all docs in a folder
     # Replace with your folder ID (see MY_TEST_IDS.txt)
     # TEST_FOLDER_ID = "YOUR_FOLDER_ID_HERE"
     # folder_items = drive.list_items(folder_id=TEST_FOLDER_ID, recursive=True)
-    # doc_ids = [item.id for item in folder_items if item.type == ItemType.DOCS_DOCUMENT]
-    # batch_export_parallel(doc_ids, output_dir, auth_config, num_workers=4)
+    # items = {item.id: item for item in folder_items if item.type == ItemType.DOCS_DOCUMENT}
+    # batch_export_parallel(list(items), output_dir, auth_config, num_workers=4, items=items, auth=auth)
     
     print(f"\n✓ Batch export complete!")
     print(f"Output saved to: {output_dir}")
@@ -0,0 +1,169 @@
+"""
+Shared helpers for the examples.
+
+Not part of any package - just small utilities the example scripts
+import so each one doesn't have to repeat them.
+"""
+import dbm
+import functools
+import json
+import os
+import random
+import shelve
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Tuple
+from dotenv import load_dotenv
+
+from googleapiclient.errors import HttpError
+from googleapi_oauth import OAuth2Client
+
+
+@dataclass(frozen=True)
+class Config:
+    """OAuth settings read from the environment / .env file."""
+    client_id: str
+    client_secret: str
+    scopes: Tuple[str, ...]
+
+    def oauth_kwargs(self) -> dict:
+        """Keyword arguments for OAuth2Client(...)."""
+        return {
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'scopes': list(self.scopes)
+        }
+
+
+@functools.cache
+def config() -> Config:
+    """Load .env and parse CLIENT_ID / CLIENT_SECRET / CLIENT_SCOPES once per process."""
+    load_dotenv()
+    return Config(
+        client_id=os.getenv('CLIENT_ID'),
+        client_secret=os.getenv('CLIENT_SECRET'),
+        scopes=tuple(os.getenv('CLIENT_SCOPES', '').split(','))
+    )
+
+
+@functools.cache
+def get_default_auth() -> OAuth2Client:
+    """
+    Process-wide OAuth2Client built from config().
+
+    Built once on first call and shared afterwards, so chained examples
+    and worker threads don't each repeat the storage lookup and token
+    refresh.
+    """
+    return OAuth2Client(**config().oauth_kwargs())
+
+
+# HTTP statuses worth retrying: rate limits and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def call_with_backoff(fn, *args, max_retries: int = 6, **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying rate-limit and server errors.
+
+    Waits 1, 2, 4, ... seconds (plus jitter, capped at 64) between
+    attempts, as the Google API docs ask for on 429s. Other errors, and
+    the last retryable one, are raised as usual.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUSES or attempt == max_retries:
+                raise
+            time.sleep(min(2 ** attempt + random.random(), 64))
+
+
+# On-disk cache for API responses that rarely change between runs
+CACHE_DIR = Path.home() / ".cache" / "googleapi-examples"
+
+_cache_lock = threading.Lock()
+
+
+@functools.cache
+def account_id(drive) -> str:
+    """
+    Identify the user signed in to drive, for scoping cache keys.
+
+    Costs one user-info request per client per process.
+    """
+    info = drive.get_user_info()
+    return info.get('email') or info.get('emailAddress') or info['name']
+
+
+def disk_cached(key: str, fetch, ttl: float = 3600, account: str = ''):
+    """
+    Return a cached value for key, calling fetch() on a miss.
+
+    Values are pickled into a shelve file under CACHE_DIR and reused
+    across runs until they are older than ttl seconds. Keys are scoped
+    to the configured client ID and scopes (the OAuth app) and to
+    account, so pass account_id(drive) for anything user-specific -
+    otherwise two users of the same app would share entries. An entry
+    that can't be read (corrupt file, or a pickled class that changed
+    after a package upgrade) counts as a miss.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path = str(CACHE_DIR / "cache")
+    cfg = config()
+    key = f"{cfg.client_id}|{','.join(sorted(cfg.scopes))}|{account}|{key}"
+
+    try:
+        with _cache_lock, shelve.open(cache_path) as db:
+            entry = db.get(key)
+    except Exception:
+        entry = None
+    if entry and time.time() - entry[0] < ttl:
+        return entry[1]
+
+    value = fetch()
+    try:
+        with _cache_lock:
+            try:
+                db = shelve.open(cache_path)
+            except (*dbm.error, ValueError, SyntaxError):
+                # Unreadable cache file (dbm.dumb reports a corrupt index
+                # as ValueError/SyntaxError) - start a fresh one
+                db = shelve.open(cache_path, flag='n')
+            with db:
+                db[key] = (time.time(), value)
+    except Exception:
+        pass  # caching is best-effort, e.g. a value that can't be pickled
+    return value
+
+
+def cached_get_item(drive, item_id: str, ttl: float = 3600):
+    """drive.get_item() cached on disk for ttl seconds, per signed-in user."""
+    return disk_cached(
+        f"item:{item_id}", lambda: drive.get_item(item_id), ttl,
+        account=account_id(drive)
+    )
+
+
+def use_fast_json() -> bool:
+    """
+    Parse Google API responses with orjson when it is installed.
+
+    googleapiclient decodes every response with the stdlib json module;
+    for large Docs/Slides payloads that parse is a noticeable CPU cost.
+    Only loads() is swapped - orjson.dumps returns bytes and lacks the
+    stdlib keyword arguments, so request bodies still use json.dumps.
+
+    Returns:
+        True if orjson is now in use, False if it isn't installed
+    """
+    try:
+        import orjson
+        from googleapiclient import model
+    except ImportError:
+        return False
+    model.json = SimpleNamespace(loads=orjson.loads, dumps=json.dumps, decoder=json.decoder)
+    return True